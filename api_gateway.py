@@ -1,6 +1,8 @@
 """API Gateway for orchestrating audio workflows."""
 
 import os
+from typing import List
+
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
@@ -22,7 +24,12 @@ class WorkflowRequest(BaseModel):
     client_id: str
 
 
-@app.post("/api/audio/edit")
+class WorkflowResponse(BaseModel):
+    workflow_id: str
+    steps: List[str]
+
+
+@app.post("/api/audio/edit", response_model=WorkflowResponse)
 def enqueue_workflow(req: WorkflowRequest):
     """Submit a workflow to the orchestrator."""
     try:
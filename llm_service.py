@@ -1,8 +1,13 @@
 """Service for parsing natural language audio requests using an LLM."""
 from __future__ import annotations
 
+import copy
+import functools
+import hashlib
 import json
 import logging
+import threading
+from collections import OrderedDict
 from typing import Any, Dict
 
 # Operations schema replicated from API to help the LLM understand available actions
@@ -125,21 +130,64 @@ def _build_prompt(text: str) -> str:
     )
 
 
+# Successful parses keyed by a digest of the whitespace-normalized request
+PARSE_CACHE_SIZE = 1024
+_parse_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def _cache_key(text: str) -> bytes:
+    normalized = " ".join(text.split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
 def parse_request(text: str) -> Dict[str, Any]:
     """Parse a natural language request into a structured JSON command.
 
+    Successful results are cached, so repeating a request (e.g. a client
+    retry) doesn't call the LLM again. Failures are never cached.
+
     Returns a dictionary with keys:
     - ``success`` (bool): whether parsing succeeded.
     - ``data`` (dict): the parsed JSON when successful.
     - ``error`` (str): error message when parsing fails.
     - ``prompt`` (str): the prompt sent to the LLM for debugging purposes.
     """
+    key = _cache_key(text)
+    with _parse_cache_lock:
+        cached = _parse_cache.get(key)
+        if cached is not None:
+            _parse_cache.move_to_end(key)
+            return copy.deepcopy(cached)
+
+    result = _parse_uncached(text)
+
+    if result["success"]:
+        with _parse_cache_lock:
+            _parse_cache[key] = copy.deepcopy(result)
+            if len(_parse_cache) > PARSE_CACHE_SIZE:
+                _parse_cache.popitem(last=False)
+    return result
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client() -> Any:
+    """Return the process-wide OpenAI client.
+
+    The client owns an HTTP connection pool, so reusing it keeps connections
+    to the API alive between requests instead of reconnecting every time.
+    """
+    from openai import OpenAI
+
+    return OpenAI()
+
+
+def _parse_uncached(text: str) -> Dict[str, Any]:
+    """Send the request to the LLM and validate its JSON response."""
     prompt = _build_prompt(text)
 
     try:
-        from openai import OpenAI
-
-        client = OpenAI()
+        client = _get_client()
         response = client.responses.create(
             model="gpt-4o-mini",
             input=prompt,
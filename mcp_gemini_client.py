@@ -6,11 +6,19 @@ for natural language audio processing.
 """
 
 import asyncio
+import functools
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Deque, Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import uuid
+from collections import Counter, deque
+
+import numpy as np
 
 # Import our MCP Audio Server
 from mcp_audio_server import MCPAudioServer
@@ -19,16 +27,8 @@ from mcp_audio_server import MCPAudioServer
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class MCPGeminiClient:
-    """MCP Client for Gemini + Audio Agent Integration"""
-    
-    def __init__(self):
-        self.audio_server = MCPAudioServer()
-        self.conversation_history = []
-        self.gemini_responses = []
-        
-        # System prompt for Gemini
-        self.system_prompt = """
+# System prompt for Gemini
+SYSTEM_PROMPT = """
 You are WaveQ Audio Processing Assistant, an expert in audio editing and processing.
 
 Your capabilities include:
@@ -46,6 +46,312 @@ When a user asks about audio processing:
 
 Always be helpful, clear, and professional. If you're unsure about something, ask for clarification.
 """
+
+INTENT_PROMPT_TEMPLATE = """
+User Request: "{user_message}"
+
+Briefly describe what the user wants to achieve with their audio and any
+goals or constraints implied by the request.
+"""
+
+OPERATION_PROMPT_TEMPLATE = """
+User Request: "{user_message}"
+
+Parsed Audio Operations: {operations}
+
+Please provide:
+1. Confirmation that the operations match the user's intent
+2. Any additional suggestions or optimizations
+3. Potential issues or considerations
+4. Professional audio processing advice
+
+Respond in a helpful, professional manner.
+"""
+
+SIMULATED_ANALYSIS_TEMPLATE = """
+Audio Processing Analysis:
+
+✅ Operations correctly identified: {count} operations
+✅ Parameters extracted appropriately
+✅ Operation order optimized for best results
+
+Suggestions:
+- Consider adding fade-in/fade-out for smoother transitions
+- Monitor audio quality during processing
+- Test with a small sample first
+
+The parsed operations appear to match your request well. The system will process them in the optimal order for best results.
+
+Professional Advice:
+- Always backup original files before processing
+- Use high-quality settings for final output
+- Consider the target platform (web, mobile, broadcast)
+"""
+
+_last_iso: Tuple[int, str] = (0, "")
+
+
+def _now_iso() -> str:
+    """Current local time in ISO format, formatted at most once per second"""
+    global _last_iso
+    now = int(time.time())
+    if _last_iso[0] != now:
+        _last_iso = (now, datetime.fromtimestamp(now).isoformat())
+    return _last_iso[1]
+
+
+BATCH_TERMINAL_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9_']+")
+
+
+def _hashed_embedding(text: str, dim: int) -> np.ndarray:
+    """Embed text as a signed, hashed bag of words and word bigrams.
+
+    Uses ``zlib.crc32`` rather than ``hash()`` so vectors are stable across
+    processes and can be persisted.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    vec = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    return vec
+
+
+@functools.lru_cache(maxsize=256)
+def _build_processing_summary(operation_types: Tuple[str, ...]) -> Dict[str, Any]:
+    """Build the processing summary for a sorted tuple of operation types"""
+    counts = dict(Counter(operation_types))
+    
+    # Add recommendations based on operations
+    recommendations = []
+    if "noise_reduction" in counts:
+        recommendations.append("Use headphones to monitor noise reduction quality")
+    
+    if "normalize" in counts:
+        recommendations.append("Check final levels to ensure they meet platform requirements")
+    
+    if "convert_format" in counts:
+        recommendations.append("Verify output format compatibility with target platform")
+    
+    return {
+        "total_operations": len(operation_types),
+        "operation_types": counts,
+        "estimated_duration": "2-5 minutes",
+        "complexity": "medium" if len(operation_types) <= 3 else "high",
+        "recommendations": recommendations,
+    }
+
+
+def _operations_key(operations: List[Dict[str, Any]]) -> str:
+    """Canonical JSON of the operation chain: names and parameters, in order"""
+    return json.dumps(
+        [[op["operation"], op.get("parameters") or {}] for op in operations],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+
+
+class SemanticCache:
+    """Embedding-keyed cache of Gemini insights.
+
+    Entries are keyed in two parts: the parsed operation chain, parameters
+    included, must match exactly, and only the user message is matched
+    fuzzily. Message embeddings are stored as rows of a normalized ``(N, D)``
+    float32 matrix; a cosine similarity of at least ``threshold`` among the
+    entries for the same operations counts as a hit.
+
+    At most ``max_entries`` entries are kept; once full, the oldest quarter
+    is evicted in one pass so adds stay amortized O(1).
+
+    When ``path`` is given the cache is reloaded from ``<path>.npz``
+    (vectors) and ``<path>.json`` (insights) on construction. Writing is left
+    to the caller: ``snapshot()`` copies the state cheaply and ``write()``
+    can then run off the event loop.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        dim: int = 512,
+        path: Optional[str] = None,
+        embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+        max_entries: int = 10_000,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.threshold = threshold
+        self.dim = dim
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.embed_fn = embed_fn or (lambda text: _hashed_embedding(text, dim))
+        self._matrix = np.zeros((64, dim), dtype=np.float32)
+        self._entries: List[Dict[str, Any]] = []
+        # Operations key -> matrix rows of the entries for those operations
+        self._rows: Dict[str, List[int]] = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+
+        if self.path is not None:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _embed(self, user_message: str) -> np.ndarray:
+        vec = np.asarray(self.embed_fn(user_message), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def lookup(self, user_message: str, operations: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Return a copy of the closest cached insights, or None on a miss"""
+        rows = self._rows.get(_operations_key(operations))
+        if rows:
+            sims = self._matrix[rows] @ self._embed(user_message)
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                self.hits += 1
+                return dict(self._entries[rows[best]]["insights"])
+        self.misses += 1
+        return None
+
+    def _index(self, entries: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        rows: Dict[str, List[int]] = {}
+        for row, entry in enumerate(entries):
+            rows.setdefault(entry["operations"], []).append(row)
+        return rows
+
+    def _evict(self, count: int) -> None:
+        """Drop the ``count`` oldest entries and compact the matrix"""
+        size = len(self._entries)
+        self._matrix[: size - count] = self._matrix[count:size]
+        del self._entries[:count]
+        self._rows = self._index(self._entries)
+
+    def add(self, user_message: str, operations: List[Dict[str, Any]], insights: Dict[str, Any]) -> None:
+        """Store insights for a request, growing the matrix as needed"""
+        if len(self._entries) >= self.max_entries:
+            self._evict(max(1, self.max_entries // 4))
+        size = len(self._entries)
+        if size == self._matrix.shape[0]:
+            grown = np.zeros((min(size * 2, self.max_entries), self.dim), dtype=np.float32)
+            grown[:size] = self._matrix
+            self._matrix = grown
+        key = _operations_key(operations)
+        self._matrix[size] = self._embed(user_message)
+        self._entries.append({"operations": key, "insights": dict(insights)})
+        self._rows.setdefault(key, []).append(size)
+        self.dirty = True
+
+    def snapshot(self) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """Copy the current vectors and entries for writing, and mark clean"""
+        self.dirty = False
+        return self._matrix[: len(self._entries)].copy(), list(self._entries)
+
+    def write(self, matrix: np.ndarray, entries: List[Dict[str, Any]]) -> None:
+        """Persist a snapshot next to ``path``; safe to run in a worker thread"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(self.path.with_suffix(".npz"), matrix=matrix)
+        self.path.with_suffix(".json").write_text(json.dumps(entries))
+
+    def save(self) -> None:
+        """Persist the cache synchronously"""
+        self.write(*self.snapshot())
+
+    def load(self) -> None:
+        """Load a previously persisted cache, if any"""
+        npz_path = self.path.with_suffix(".npz")
+        json_path = self.path.with_suffix(".json")
+        if not (npz_path.exists() and json_path.exists()):
+            return
+        try:
+            with np.load(npz_path) as data:
+                matrix = data["matrix"].astype(np.float32)
+            entries = json.loads(json_path.read_text())
+            for entry in entries:
+                if not isinstance(entry.get("insights"), dict):
+                    raise ValueError("entry without insights")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable insight cache {self.path}: {e}")
+            return
+        if matrix.shape != (len(entries), self.dim):
+            logger.warning(f"Ignoring insight cache {self.path}: shape mismatch")
+            return
+        # Keep the newest entries if the file was written with a larger limit
+        matrix, entries = matrix[-self.max_entries:], entries[-self.max_entries:]
+        self._matrix = np.zeros((max(64, len(entries)), self.dim), dtype=np.float32)
+        self._matrix[: len(entries)] = matrix
+        self._entries = entries
+        self._rows = self._index(entries)
+
+    def clear(self) -> None:
+        """Drop all entries; the emptied cache is persisted on the next save"""
+        self._matrix = np.zeros((64, self.dim), dtype=np.float32)
+        self._entries = []
+        self._rows = {}
+        self.dirty = True
+        self.hits = 0
+        self.misses = 0
+
+
+class MCPGeminiClient:
+    """MCP Client for Gemini + Audio Agent Integration"""
+    
+    def __init__(
+        self,
+        gemini_client: Any = None,
+        model: str = "gemini-pro",
+        cache_path: Optional[str] = None,
+        cache_threshold: float = 0.9,
+        embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+        cache_save_delay: float = 1.0,
+        cache_max_entries: int = 10_000,
+        history_limit: int = 1000,
+        use_batch_api: bool = False,
+        max_batch: int = 16,
+        flush_interval_ms: int = 50,
+        batch_poll_interval: float = 5.0,
+    ):
+        self.audio_server = MCPAudioServer()
+        # Optional google.genai client; responses are simulated without one
+        self.gemini_client = gemini_client
+        self.model = model
+        
+        # Batch API jobs take seconds to minutes, so they are opt-in for bulk
+        # callers; interactive use sends each prompt directly
+        self.use_batch_api = use_batch_api
+        # Prompts waiting to be sent to Gemini in the next batch
+        self.max_batch = max_batch
+        self.flush_interval_ms = flush_interval_ms
+        self.batch_poll_interval = batch_poll_interval
+        self._pending: List[Tuple[str, "asyncio.Future[Optional[str]]"]] = []
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._flusher: Optional["asyncio.Task[None]"] = None
+        # Bounded so long-running sessions don't grow without limit
+        self.conversation_history: Deque[Dict[str, Any]] = deque(maxlen=history_limit)
+        self.gemini_responses: Deque[Dict[str, Any]] = deque(maxlen=history_limit)
+        self._history_times: Deque[float] = deque(maxlen=history_limit)
+        self._role_counts: Counter = Counter()
+        self.insight_cache = SemanticCache(
+            threshold=cache_threshold,
+            path=cache_path,
+            embed_fn=embed_fn,
+            max_entries=cache_max_entries,
+        )
+        # New cache entries are written in the background, at most once per delay
+        self.cache_save_delay = cache_save_delay
+        self._cache_save_task: Optional["asyncio.Task[None]"] = None
+        
+        self.system_prompt = SYSTEM_PROMPT
     
     async def process_with_gemini(self, user_message: str, audio_file: str = None) -> Dict[str, Any]:
         """
@@ -67,7 +373,7 @@ Always be helpful, clear, and professional. If you're unsure about something, as
             if "error" in audio_result:
                 return audio_result
             
-            # Step 2: Get Gemini insights (simulated for now)
+            # Step 2: Get Gemini insights on the parsed operations
             gemini_insights = await self._get_gemini_insights(user_message, audio_result)
             
             # Step 3: Create enhanced response
@@ -78,21 +384,21 @@ Always be helpful, clear, and professional. If you're unsure about something, as
                 "audio_operations": audio_result["operations"],
                 "confidence": audio_result["confidence"],
                 "gemini_insights": gemini_insights,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": _now_iso(),
                 "processing_summary": self._create_processing_summary(audio_result["operations"])
             }
             
             # Add to conversation history
-            self.conversation_history.append({
+            self._append_history({
                 "role": "user",
                 "content": user_message,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _now_iso()
             })
             
-            self.conversation_history.append({
+            self._append_history({
                 "role": "assistant",
                 "content": f"Processed audio request with {len(audio_result['operations'])} operations",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": _now_iso(),
                 "operations": audio_result["operations"],
                 "gemini_insights": gemini_insights
             })
@@ -103,10 +409,184 @@ Always be helpful, clear, and professional. If you're unsure about something, as
             logger.error(f"Error in Gemini processing: {e}")
             return {"error": str(e)}
     
-    async def _get_gemini_insights(self, user_message: str, audio_result: Dict[str, Any]) -> Dict[str, Any]:
+    async def _enqueue(self, prompt: str) -> Optional[str]:
+        """
+        Get Gemini's response to a prompt
+        
+        With use_batch_api the prompt is queued for the next Gemini batch;
+        otherwise it is sent right away.
+        
+        Returns:
+            The response text, or None when no Gemini client is configured
+            (the round-trip is then simulated)
+        
+        Raises:
+            Exception: if Gemini fails to answer this prompt
+        """
+        if not self.use_batch_api:
+            return await self._generate(prompt)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((prompt, future))
+        
+        if self._flusher is None or self._flusher.done():
+            self._batch_ready = asyncio.Event()
+            self._flusher = asyncio.create_task(self._batch_flusher())
+        if len(self._pending) >= self.max_batch:
+            self._batch_ready.set()
+        
+        return await future
+    
+    async def _batch_flusher(self):
+        """Flush pending prompts every flush interval, or as soon as a batch fills up"""
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+    
+    async def flush(self):
+        """Send all pending prompts to Gemini as a single batch"""
+        batch = [(prompt, future) for prompt, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        
+        try:
+            responses = await self._generate_batch([prompt for prompt, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        if len(responses) != len(batch):
+            logger.warning(f"Gemini batch returned {len(responses)} responses for {len(batch)} prompts")
+        
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if i >= len(responses):
+                # Never leave a caller waiting on a response that won't come
+                future.set_exception(RuntimeError("Gemini batch returned no response for this prompt"))
+            elif isinstance(responses[i], BaseException):
+                future.set_exception(responses[i])
+            else:
+                future.set_result(responses[i])
+    
+    async def close(self):
+        """Flush pending prompts, stop the batch flusher and persist the cache"""
+        await self.flush()
+        if self._flusher is not None:
+            # Wake the flusher so it sees the empty queue and exits now
+            self._batch_ready.set()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        if self._cache_save_task is not None:
+            await asyncio.gather(self._cache_save_task, return_exceptions=True)
+            self._cache_save_task = None
+        if self.insight_cache.path is not None and self.insight_cache.dirty:
+            await asyncio.to_thread(self.insight_cache.write, *self.insight_cache.snapshot())
+    
+    def _schedule_cache_save(self):
+        """Persist new cache entries soon, without blocking the event loop"""
+        if self.insight_cache.path is None:
+            return
+        if self._cache_save_task is None or self._cache_save_task.done():
+            self._cache_save_task = asyncio.create_task(self._save_cache_later())
+    
+    async def _save_cache_later(self):
+        await asyncio.sleep(self.cache_save_delay)
+        # Snapshot on the loop so the write never sees a half-added entry
+        snapshot = self.insight_cache.snapshot()
+        try:
+            await asyncio.to_thread(self.insight_cache.write, *snapshot)
+        except Exception as e:
+            self.insight_cache.dirty = True
+            logger.warning(f"Failed to save insight cache: {e}")
+    
+    async def _generate(self, prompt: str) -> Optional[str]:
+        """Get Gemini's response to a single prompt, or None when simulated"""
+        if self.gemini_client is None:
+            await asyncio.sleep(0.1)
+            return None
+        
+        response = await self.gemini_client.aio.models.generate_content(
+            model=self.model, contents=prompt, config={"system_instruction": self.system_prompt}
+        )
+        return response.text
+    
+    async def _generate_batch(self, prompts: List[str]) -> List[Any]:
+        """
+        Get Gemini responses for a list of prompts
+        
+        A single prompt is sent directly; several are submitted as one
+        Gemini Batch API job, which is polled until it finishes.
+        
+        Returns:
+            One entry per prompt: the response text, None when simulated, or
+            the exception for a prompt the batch failed to answer
+        """
+        if self.gemini_client is None or len(prompts) == 1:
+            return list(await asyncio.gather(*(self._generate(prompt) for prompt in prompts)))
+        
+        config = {"system_instruction": self.system_prompt}
+        job = await self.gemini_client.aio.batches.create(
+            model=self.model,
+            src=[
+                {"contents": [{"role": "user", "parts": [{"text": prompt}]}], "config": config}
+                for prompt in prompts
+            ],
+        )
+        while job.state.name not in BATCH_TERMINAL_STATES:
+            await asyncio.sleep(self.batch_poll_interval)
+            job = await self.gemini_client.aio.batches.get(name=job.name)
+        
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            raise RuntimeError(f"Gemini batch {job.name} ended in state {job.state.name}")
+        
+        return [
+            item.response.text
+            if item.response is not None and getattr(item, "error", None) is None
+            else RuntimeError(f"Gemini batch item failed: {getattr(item, 'error', None)}")
+            for item in job.dest.inlined_responses
+        ]
+    
+    async def _get_intent_insights(self, user_message: str) -> str:
+        """Get Gemini's reading of the user's intent from the raw prompt"""
+        prompt = INTENT_PROMPT_TEMPLATE.format(user_message=user_message)
+        response = await self._enqueue(prompt)
+        if response is not None:
+            return response
+        
+        # Simulate Gemini response
+        return f'The user wants to edit their audio: "{user_message}"'
+    
+    async def _get_operation_insights(self, user_message: str, operations: List[Dict[str, Any]]) -> str:
+        """Get Gemini's analysis of the operations parsed by the Audio Agent"""
+        prompt = OPERATION_PROMPT_TEMPLATE.format(
+            user_message=user_message, operations=json.dumps(operations, indent=2)
+        )
+        response = await self._enqueue(prompt)
+        if response is not None:
+            return response
+        
+        # Simulate Gemini response
+        return SIMULATED_ANALYSIS_TEMPLATE.format(count=len(operations))
+    
+    async def _get_gemini_insights(
+        self,
+        user_message: str,
+        audio_result: Dict[str, Any],
+    ) -> Dict[str, Any]:
         """
         Get insights from Gemini about the audio request
         
+        The insight cache is checked first, so a hit makes no Gemini calls;
+        on a miss the intent and operation prompts are sent concurrently.
+        
         Args:
             user_message: Original user message
             audio_result: Result from Audio Agent
@@ -114,52 +594,33 @@ Always be helpful, clear, and professional. If you're unsure about something, as
         Returns:
             Gemini insights and suggestions
         """
-        try:
-            # Simulate Gemini API call
-            await asyncio.sleep(0.1)
-            
-            # Create enhanced prompt
-            enhanced_prompt = f"""
-User Request: "{user_message}"
+        operations = audio_result["operations"]
+        # Simulated responses are cheap and quote the message, so only real
+        # Gemini responses go through the cache
+        use_cache = self.gemini_client is not None
+        cached = self.insight_cache.lookup(user_message, operations) if use_cache else None
+        if cached is not None:
+            cached["timestamp"] = _now_iso()
+            cached["confidence"] = audio_result["confidence"]
+            return cached
 
-Parsed Audio Operations: {json.dumps(audio_result["operations"], indent=2)}
-
-Please provide:
-1. Confirmation that the operations match the user's intent
-2. Any additional suggestions or optimizations
-3. Potential issues or considerations
-4. Professional audio processing advice
-
-Respond in a helpful, professional manner.
-"""
-            
-            # Simulate Gemini response
-            gemini_response = f"""
-Audio Processing Analysis:
-
-✅ Operations correctly identified: {len(audio_result["operations"])} operations
-✅ Parameters extracted appropriately
-✅ Operation order optimized for best results
-
-Suggestions:
-- Consider adding fade-in/fade-out for smoother transitions
-- Monitor audio quality during processing
-- Test with a small sample first
-
-The parsed operations appear to match your request well. The system will process them in the optimal order for best results.
-
-Professional Advice:
-- Always backup original files before processing
-- Use high-quality settings for final output
-- Consider the target platform (web, mobile, broadcast)
-"""
+        try:
+            analysis, intent = await asyncio.gather(
+                self._get_operation_insights(user_message, operations),
+                self._get_intent_insights(user_message),
+            )
             
-            return {
-                "analysis": gemini_response,
-                "timestamp": datetime.now().isoformat(),
-                "model": "gemini-pro",
+            insights = {
+                "analysis": analysis,
+                "intent": intent,
+                "timestamp": _now_iso(),
+                "model": self.model,
                 "confidence": audio_result["confidence"]
             }
+            if use_cache:
+                self.insight_cache.add(user_message, operations, insights)
+                self._schedule_cache_save()
+            return insights
             
         except Exception as e:
             logger.error(f"Error getting Gemini insights: {e}")
@@ -167,37 +628,29 @@ Professional Advice:
     
     def _create_processing_summary(self, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Create a summary of the processing operations"""
-        summary = {
-            "total_operations": len(operations),
-            "operation_types": {},
-            "estimated_duration": "2-5 minutes",
-            "complexity": "medium" if len(operations) <= 3 else "high",
-            "recommendations": []
+        summary = _build_processing_summary(tuple(sorted(op["operation"] for op in operations)))
+        # Copy so callers can't mutate the cached summary
+        return {
+            **summary,
+            "operation_types": dict(summary["operation_types"]),
+            "recommendations": list(summary["recommendations"]),
         }
-        
-        # Count operation types
-        for op in operations:
-            op_type = op["operation"]
-            summary["operation_types"][op_type] = summary["operation_types"].get(op_type, 0) + 1
-        
-        # Add recommendations based on operations
-        if "noise_reduction" in summary["operation_types"]:
-            summary["recommendations"].append("Use headphones to monitor noise reduction quality")
-        
-        if "normalize" in summary["operation_types"]:
-            summary["recommendations"].append("Check final levels to ensure they meet platform requirements")
-        
-        if "convert_format" in summary["operation_types"]:
-            summary["recommendations"].append("Verify output format compatibility with target platform")
-        
-        return summary
+    
+    def _append_history(self, message: Dict[str, Any]):
+        """Append to conversation history, keeping per-role counts in sync"""
+        history = self.conversation_history
+        if history.maxlen is not None and len(history) == history.maxlen:
+            self._role_counts[history[0]["role"]] -= 1
+        history.append(message)
+        self._history_times.append(time.monotonic())
+        self._role_counts[message["role"]] += 1
     
     def get_conversation_summary(self) -> Dict[str, Any]:
         """Get conversation history summary"""
         return {
             "total_messages": len(self.conversation_history),
-            "user_messages": len([m for m in self.conversation_history if m["role"] == "user"]),
-            "assistant_messages": len([m for m in self.conversation_history if m["role"] == "assistant"]),
+            "user_messages": self._role_counts["user"],
+            "assistant_messages": self._role_counts["assistant"],
             "gemini_responses": len(self.gemini_responses),
             "conversation_duration": self._calculate_conversation_duration(),
             "last_message": self.conversation_history[-1] if self.conversation_history else None
@@ -208,17 +661,17 @@ Professional Advice:
         if len(self.conversation_history) < 2:
             return "0 minutes"
         
-        first_time = datetime.fromisoformat(self.conversation_history[0]["timestamp"])
-        last_time = datetime.fromisoformat(self.conversation_history[-1]["timestamp"])
-        duration = last_time - first_time
+        duration = self._history_times[-1] - self._history_times[0]
         
-        minutes = int(duration.total_seconds() / 60)
+        minutes = int(duration / 60)
         return f"{minutes} minutes"
     
     def clear_conversation_history(self):
         """Clear conversation history"""
         self.conversation_history.clear()
         self.gemini_responses.clear()
+        self._history_times.clear()
+        self._role_counts.clear()
         logger.info("Conversation history cleared")
 
 # Test the MCP Gemini Client
@@ -235,13 +688,15 @@ async def test_mcp_gemini_client():
         "I need to remove background noise and convert to MP3 format"
     ]
     
-    for request in test_requests:
+    # Process all requests concurrently
+    results = await asyncio.gather(
+        *(client.process_with_gemini(request) for request in test_requests)
+    )
+    
+    for request, result in zip(test_requests, results):
         print(f"User Request: {request}")
         print("-" * 60)
         
-        # Process with Gemini
-        result = await client.process_with_gemini(request)
-        
         if "error" not in result:
             print(f"Audio Operations: {len(result['audio_operations'])}")
             for op in result['audio_operations']:
@@ -258,6 +713,8 @@ async def test_mcp_gemini_client():
         
         print("=" * 60)
     
+    await client.close()
+    
     # Show conversation summary
     summary = client.get_conversation_summary()
     print(f"\nConversation Summary:")
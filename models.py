@@ -1,17 +1,21 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy import Column, Integer, String, DateTime, Float, Index
 from database import Base
 
 
 class APIRequest(Base):
     __tablename__ = "api_requests"
+    __table_args__ = (
+        Index("ix_api_requests_status_submitted", "status", "submitted_at"),
+        Index("ix_api_requests_client_submitted", "client_id", "submitted_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    request_id = Column(String, unique=True, index=True)
-    status = Column(String, default="submitted")
+    request_id = Column(String(64), unique=True, index=True)
+    status = Column(String(16), default="submitted")
     file_path = Column(String, nullable=True)
     payload = Column(String, nullable=True)
-    client_id = Column(String, nullable=True)
+    client_id = Column(String(64), nullable=True)
     submitted_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     progress = Column(Float, nullable=True)
@@ -19,15 +23,18 @@ class APIRequest(Base):
 
 class AudioEditRequest(Base):
     __tablename__ = "audio_edit_requests"
+    __table_args__ = (
+        Index("ix_audio_edit_requests_client_status", "client_name", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    request_id = Column(String, unique=True, index=True)
+    request_id = Column(String(64), unique=True, index=True)
     client_name = Column(String, nullable=False)
     audio_file = Column(String, nullable=False)
     edit_type = Column(String, nullable=False)
     description = Column(String, nullable=False)
-    priority = Column(String, default="normal")
-    status = Column(String, default="pending")
+    priority = Column(String(16), default="normal")
+    status = Column(String(16), default="pending", index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     processing_time = Column(Float, nullable=True)
@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
-import json
+import copy
+import functools
 import logging
 import os
 import threading
 import uuid
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import AbstractSet, Any, Dict, List, Optional
 
 # ----- Optional AudioAgent validation -----
 try:  # לא חובה בזמן ריצה
@@ -17,20 +18,62 @@ except Exception:  # pragma: no cover
     AudioAgent = None  # type: ignore
 
 # ----- Third-party runtime deps -----
+import orjson
 import yaml  # type: ignore
 from redis import Redis  # type: ignore
 from rq import Queue, Worker, Retry  # type: ignore
 import paho.mqtt.client as mqtt  # type: ignore
 
+try:  # libyaml bindings are much faster when available
+    from yaml import CSafeLoader as _YAMLLoader  # type: ignore
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as _YAMLLoader  # type: ignore
+
 logger = logging.getLogger(__name__)
 MQTT_TOPIC = "audio/edit"
+# Seconds a job waits for its MQTT messages to be handed to the broker
+MQTT_PUBLISH_TIMEOUT = 10.0
+# Status heartbeat never changes, so serialize it once
+_STATUS_DISPATCHED = orjson.dumps({"status": "dispatched"})
 
 
 # ----------------------------- Flow parsing ----------------------------- #
+@functools.lru_cache(maxsize=1)
+def _supported_ops() -> Optional[frozenset[str]]:
+    """Operations supported by AudioAgent, or None if it is unavailable.
+
+    Cached so the agent is only constructed once per process.
+    """
+    if AudioAgent is None:
+        return None
+    try:
+        agent = AudioAgent()
+        return frozenset(getattr(agent, "supported_operations", {}) or {})
+    except Exception:  # graceful degrade
+        return None
+
+
+@functools.lru_cache(maxsize=128)
+def _load_flow_document(path: str, mtime_ns: int, size: int) -> Any:
+    """Read and parse a flow file.
+
+    Keyed on the file's mtime and size as well as its path, so an edited
+    file is re-parsed while unchanged ones are served from the cache.
+    Callers must not mutate the returned document.
+    """
+    flow_path = Path(path)
+    suffix = flow_path.suffix.lower()
+    if suffix in {".yaml", ".yml"}:
+        return yaml.load(flow_path.read_bytes(), Loader=_YAMLLoader)
+    if suffix == ".json":
+        return orjson.loads(flow_path.read_bytes())
+    raise ValueError("Unsupported flow format. Use YAML or JSON.")
+
+
 def parse_flow(
     file_path: str,
     *,
-    supported_ops: Optional[set[str]] = None,
+    supported_ops: Optional[AbstractSet[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Parse a flow definition file (YAML/JSON) into ordered 'actions'.
@@ -47,65 +90,136 @@ def parse_flow(
         ValueError: unsupported format or unknown step type
     """
     path = Path(file_path)
-    if not path.exists():
-        raise FileNotFoundError(f"Flow file not found: {file_path}")
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Flow file not found: {file_path}") from None
 
-    suffix = path.suffix.lower()
-    if suffix in {".yaml", ".yml"}:
-        data = yaml.safe_load(path.read_text())
-    elif suffix == ".json":
-        data = json.loads(path.read_text())
-    else:
-        raise ValueError("Unsupported flow format. Use YAML or JSON.")
+    # Deep-copy so callers can't mutate the cached document
+    data = copy.deepcopy(_load_flow_document(str(path), st.st_mtime_ns, st.st_size))
 
     steps = data.get("steps", [])
     workflow_name = data.get("workflow_name", Path(file_path).stem)
 
     # Discover supported operations from AudioAgent if available
     if supported_ops is None:
-        if AudioAgent is not None:
-            try:
-                agent = AudioAgent()
-                supported_ops = set(getattr(agent, "supported_operations", {}) or {})
-            except Exception:  # graceful degrade
-                supported_ops = None
-        else:
-            supported_ops = None
+        supported_ops = _supported_ops()
 
-    actions: List[Dict[str, Any]] = []
+    # Preallocate and bind hot lookups to locals for long flows
+    actions: List[Dict[str, Any]] = [None] * len(steps)  # type: ignore[list-item]
+    uuid4 = uuid.uuid4
+    topic = MQTT_TOPIC
 
     for idx, step in enumerate(steps, 1):
-        step_type = step.get("type")
+        get = step.get
+        step_type = get("type")
         if not isinstance(step_type, str):
             raise ValueError(f"Step #{idx} missing 'type' string")
         if supported_ops and step_type not in supported_ops:
             raise ValueError(f"Unsupported step type: {step_type}")
 
-        request_id = f"{workflow_name}_{idx}_{uuid.uuid4().hex[:8]}"
-        parameters = step.get("parameters", {}) or {}
-
+        parameters = get("parameters") or {}
         payload = {
-            "request_id": request_id,
+            "request_id": f"{workflow_name}_{idx}_{uuid4().hex[:8]}",
             "operation": step_type,
             "parameters": parameters,
         }
 
-        actions.append(
-            {
-                "name": step.get("name", f"step_{idx}"),
-                "operation": step_type,
-                "parameters": parameters,
-                "mqtt": {"topic": MQTT_TOPIC, "payload": payload},
-                "queue_task": payload,
-                # מאפשר לציין פר־צעד ttl/retries בקובץ ה-flow (לא חובה)
-                "ttl": step.get("ttl"),
-                "retries": step.get("retries"),
-            }
-        )
+        actions[idx - 1] = {
+            "name": get("name", f"step_{idx}"),
+            "operation": step_type,
+            "parameters": parameters,
+            "mqtt": {"topic": topic, "payload": payload},
+            "queue_task": payload,
+            # מאפשר לציין פר־צעד ttl/retries בקובץ ה-flow (לא חובה)
+            "ttl": get("ttl"),
+            "retries": get("retries"),
+        }
 
     return actions
 
 
+# ---------------------------- Shared clients ---------------------------- #
+_clients_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8)
+def _connect_redis(url: str) -> Redis:
+    return Redis.from_url(url, health_check_interval=30, socket_keepalive=True)
+
+
+@functools.lru_cache(maxsize=8)
+def _connect_mqtt(broker: str, port: int) -> mqtt.Client:
+    # Raises on failure, so a failed connection is not cached
+    client = mqtt.Client()
+    client.connect(broker, port)
+    client.loop_start()
+    return client
+
+
+def _reset_clients_after_fork() -> None:
+    """Drop inherited MQTT clients in a forked child (e.g. an RQ work-horse).
+
+    The child gets a copy of the parent's socket but not its loop_start()
+    thread, so inherited clients would only queue messages that are never
+    sent. The lock is replaced too, in case another thread held it at fork.
+    """
+    global _clients_lock
+    _clients_lock = threading.Lock()
+    _connect_mqtt.cache_clear()
+
+
+if hasattr(os, "register_at_fork"):  # POSIX only
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+
+def _get_redis(url: str) -> Redis:
+    """Return the process-wide Redis client for `url`."""
+    with _clients_lock:
+        return _connect_redis(url)
+
+
+def _get_mqtt_client(broker: str, port: int) -> mqtt.Client:
+    """Return the process-wide connected MQTT client for `broker`:`port`."""
+    with _clients_lock:
+        return _connect_mqtt(broker, port)
+
+
+# ------------------------------- Worker job ------------------------------ #
+def _dispatch_step(payload: dict, *, redis_url: str, mqtt_broker: str, mqtt_port: int) -> None:
+    """
+    Worker job that publishes a workflow step to MQTT.
+
+    Module-level so RQ can import it by name; clients are resolved through
+    the shared factories inside the worker instead of being pickled.
+
+    Raises if the messages are not confirmed sent within
+    MQTT_PUBLISH_TIMEOUT, so RQ marks the job failed (and retries it)
+    instead of reporting a step that never reached the broker.
+    """
+    step_id = payload["id"]
+    status_key = f"status:{step_id}"
+
+    mqtt_client = _get_mqtt_client(mqtt_broker, mqtt_port)
+    infos = (
+        # Publish the job to the processing topic
+        mqtt_client.publish(MQTT_TOPIC, orjson.dumps(payload)),
+        # Emit a status heartbeat on the callback topic
+        mqtt_client.publish(payload["callback"], _STATUS_DISPATCHED),
+    )
+    # publish() only queues the message for the network loop; wait until it
+    # is written so a short-lived work-horse can't exit before it is sent
+    for info in infos:
+        info.wait_for_publish(MQTT_PUBLISH_TIMEOUT)
+        if not info.is_published():
+            raise TimeoutError(f"MQTT publish for step {step_id} not confirmed")
+
+    try:
+        _get_redis(redis_url).set(status_key, "dispatched")
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Redis set failed: %s", exc)
+
+
 # ----------------------------- Orchestrator ----------------------------- #
 class WorkflowOrchestrator:
     """Orchestrates audio workflows using Redis/RQ and MQTT."""
@@ -122,15 +236,19 @@ class WorkflowOrchestrator:
         mqtt_broker = mqtt_broker or os.getenv("MCP_MQTT_BROKER", "localhost")
         mqtt_port = int(mqtt_port or os.getenv("MCP_MQTT_PORT", 1883))
 
-        self.redis = Redis.from_url(redis_url)
+        self.redis_url = redis_url
+        self.mqtt_broker = mqtt_broker
+        self.mqtt_port = mqtt_port
+
+        # Clients are shared by every orchestrator in the process
+        self.redis = _get_redis(redis_url)
         self.queue = Queue("audio_workflows", connection=self.redis)
 
-        self.mqtt_client = mqtt.Client()
         try:
-            self.mqtt_client.connect(mqtt_broker, mqtt_port)
-            self.mqtt_client.loop_start()
+            self.mqtt_client: Optional[mqtt.Client] = _get_mqtt_client(mqtt_broker, mqtt_port)
         except Exception as exc:  # pragma: no cover
             logger.warning("MQTT connection failed: %s", exc)
+            self.mqtt_client = None
 
         # Workflows in memory: name -> list[step]
         # כל צעד לפחות: {'operation': str, 'parameters': dict, 'ttl': int?, 'retries': int?}
@@ -181,6 +299,7 @@ class WorkflowOrchestrator:
 
         workflow_id = str(uuid.uuid4())
         step_ids: list[str] = []
+        jobs = []
 
         for step in steps:
             step_id = str(uuid.uuid4())
@@ -193,35 +312,27 @@ class WorkflowOrchestrator:
                 "parameters": step.get("parameters", {}) or {},
                 "callback": f"audio/status/{step_id}",
             }
-            self.queue.enqueue(
-                self._dispatch_step,
-                payload,
-                job_id=step_id,
-                ttl=int(step.get("ttl", 3600)),
-                retry=Retry(max=int(step.get("retries", 0))),
+            retries = int(step.get("retries", 0) or 0)
+            jobs.append(
+                Queue.prepare_data(
+                    _dispatch_step,
+                    (payload,),
+                    {
+                        "redis_url": self.redis_url,
+                        "mqtt_broker": self.mqtt_broker,
+                        "mqtt_port": self.mqtt_port,
+                    },
+                    job_id=step_id,
+                    ttl=int(step.get("ttl") or 3600),
+                    retry=Retry(max=retries) if retries > 0 else None,
+                )
             )
             step_ids.append(step_id)
 
-        return {"workflow_id": workflow_id, "steps": step_ids}
-
-    # ---- Worker job ----
-    def _dispatch_step(self, payload: dict) -> None:
-        """Worker job that publishes a workflow step to MQTT."""
-        step_id = payload["id"]
-        status_key = f"status:{step_id}"
+        # Enqueue all steps in a single Redis pipeline round-trip
+        self.queue.enqueue_many(jobs)
 
-        try:
-            self.redis.set(status_key, "dispatched")
-        except Exception as exc:  # pragma: no cover
-            logger.warning("Redis set failed: %s", exc)
-
-        try:
-            # Publish the job to the processing topic
-            self.mqtt_client.publish(MQTT_TOPIC, json.dumps(payload))
-            # Emit a status heartbeat on the callback topic
-            self.mqtt_client.publish(payload["callback"], json.dumps({"status": "dispatched"}))
-        except Exception as exc:  # pragma: no cover
-            logger.warning("MQTT publish failed: %s", exc)
+        return {"workflow_id": workflow_id, "steps": step_ids}
 
     # ---- Worker loop ----
     def start_worker(self) -> None:
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+import types
+
+import pytest
+import soundfile as sf
+
+# Provide a minimal stub for asyncio_mqtt to allow importing the server
+sys.modules.setdefault("asyncio_mqtt", types.ModuleType("asyncio_mqtt"))
+
+# Provide a minimal stub for the jose library if it's missing
+jose_stub = types.ModuleType("jose")
+
+
+class JWTError(Exception):
+    pass
+
+
+jose_stub.JWTError = JWTError
+jose_stub.jwt = types.SimpleNamespace(
+    encode=lambda *args, **kwargs: "token",
+    decode=lambda *args, **kwargs: {}
+)
+sys.modules.setdefault("jose", jose_stub)
+
+# Provide a minimal stub for passlib CryptContext if passlib is missing
+passlib_stub = types.ModuleType("passlib")
+passlib_context_stub = types.ModuleType("passlib.context")
+
+
+class CryptContext:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def hash(self, password):
+        return password
+
+    def verify(self, plain_password, hashed_password):
+        return plain_password == hashed_password
+
+
+passlib_context_stub.CryptContext = CryptContext
+sys.modules.setdefault("passlib", passlib_stub)
+sys.modules.setdefault("passlib.context", passlib_context_stub)
+
+# Provide a minimal stub for torchaudio to avoid heavy dependency
+ta = types.ModuleType("torchaudio")
+
+
+def _load(path):
+    data, sr = sf.read(path)
+    if data.ndim == 1:
+        data = data[None, :]
+    return data, sr
+
+
+def _save(path, waveform, sr):
+    sf.write(path, waveform.T, sr)
+
+
+class _SoxEffects:
+    @staticmethod
+    def apply_effects_tensor(waveform, sr, effects):
+        # Approximate tempo by truncating; tests only check an output is written
+        rate = float(effects[0][1]) if effects else 1.0
+        n = int(waveform.shape[-1] / rate)
+        return waveform[..., :n].copy(), sr
+
+
+ta.load = _load
+ta.save = _save
+ta.sox_effects = _SoxEffects()
+sys.modules.setdefault("torchaudio", ta)
+
+# Stub ffmpeg module to avoid dependency during tests
+sys.modules.setdefault("ffmpeg", types.ModuleType("ffmpeg"))
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine on one event loop shared by the whole session."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def asgi_client(run):
+    """Async client calling the main app in-process over ASGI, built once per session."""
+    import httpx
+
+    # Create required directories for app initialization
+    os.makedirs("static", exist_ok=True)
+    import main
+
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=main.app), base_url="http://testserver"
+    )
+    yield client
+    run(client.aclose())
@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import api_gateway
+
+
+@pytest.fixture(scope="module")
+def gateway_client():
+    return TestClient(api_gateway.app)
+
+
+def test_enqueue_workflow_returns_response_model(gateway_client, monkeypatch):
+    def fake_enqueue(workflow_name, audio_path, client_id):
+        assert (workflow_name, audio_path, client_id) == ("basic", "a.wav", "c1")
+        # Fields outside the response model are dropped
+        return {"workflow_id": "wf1", "steps": ["s1", "s2"], "internal": True}
+
+    monkeypatch.setattr(api_gateway.orchestrator, "enqueue_workflow", fake_enqueue)
+    response = gateway_client.post(
+        "/api/audio/edit",
+        json={"workflow_name": "basic", "audio_path": "a.wav", "client_id": "c1"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"workflow_id": "wf1", "steps": ["s1", "s2"]}
+
+
+def test_enqueue_unknown_workflow_is_400(gateway_client):
+    response = gateway_client.post(
+        "/api/audio/edit",
+        json={"workflow_name": "missing", "audio_path": "a.wav", "client_id": "c1"},
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown workflow: missing"}
@@ -0,0 +1,55 @@
+import sys
+import types
+
+import pytest
+
+import llm_service
+
+
+@pytest.fixture(autouse=True)
+def fake_llm(monkeypatch):
+    calls = []
+
+    def fake_parse(text):
+        calls.append(text)
+        if "fail" in text:
+            return {"success": False, "error": "bad request", "prompt": text}
+        return {"success": True, "data": {"operation": "trim", "parameters": {"end_time": 5}}}
+
+    monkeypatch.setattr(llm_service, "_parse_uncached", fake_parse)
+    llm_service._parse_cache.clear()
+    yield calls
+    llm_service._parse_cache.clear()
+
+
+def test_parse_request_cached(fake_llm):
+    first = llm_service.parse_request("trim to 5 seconds")
+    second = llm_service.parse_request("  trim to  5 seconds ")
+    assert first == second
+    assert len(fake_llm) == 1
+
+    # Callers get their own copy of the cached result
+    second["data"]["parameters"]["end_time"] = 10
+    assert llm_service.parse_request("trim to 5 seconds")["data"]["parameters"]["end_time"] == 5
+
+
+def test_parse_request_failures_not_cached(fake_llm):
+    assert not llm_service.parse_request("fail please")["success"]
+    assert not llm_service.parse_request("fail please")["success"]
+    assert len(fake_llm) == 2
+
+
+def test_openai_client_reused(monkeypatch):
+    created = []
+
+    class FakeOpenAI:
+        def __init__(self):
+            created.append(self)
+
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace(OpenAI=FakeOpenAI))
+    llm_service._get_client.cache_clear()
+    try:
+        assert llm_service._get_client() is llm_service._get_client()
+        assert len(created) == 1
+    finally:
+        llm_service._get_client.cache_clear()
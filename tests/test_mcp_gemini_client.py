@@ -0,0 +1,356 @@
+import asyncio
+import types
+
+import numpy as np
+
+from mcp_gemini_client import MCPGeminiClient, SemanticCache
+
+MSG_10 = "Please trim my podcast audio to end at 10 seconds and normalize it"
+MSG_30 = "Please trim my podcast audio to end at 30 seconds and normalize it"
+
+
+def _ops(end_time):
+    return [
+        {"operation": "trim", "parameters": {"end_time": end_time}, "confidence": 1.0},
+        {"operation": "normalize", "parameters": {"target_db": -20.0}, "confidence": 1.0},
+    ]
+
+
+class FakeModels:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content(self, model, contents, config):
+        self.prompts.append(contents)
+        return types.SimpleNamespace(text=f"gemini #{len(self.prompts)}")
+
+
+class FakeBatches:
+    def __init__(self, models):
+        self.models = models
+        self.jobs = []
+        self.fail = None  # prompts containing this text get an item error
+        self.drop = 0  # number of trailing responses to leave out
+
+    async def create(self, model, src):
+        responses = []
+        for request in src:
+            text = request["contents"][0]["parts"][0]["text"]
+            if self.fail is not None and self.fail in text:
+                responses.append(types.SimpleNamespace(response=None, error="quota exceeded"))
+                continue
+            response = await self.models.generate_content(model, text, request["config"])
+            responses.append(types.SimpleNamespace(response=response, error=None))
+        if self.drop:
+            responses = responses[: -self.drop]
+        job = types.SimpleNamespace(
+            name=f"batches/{len(self.jobs)}",
+            state=types.SimpleNamespace(name="JOB_STATE_SUCCEEDED"),
+            dest=types.SimpleNamespace(inlined_responses=responses),
+        )
+        self.jobs.append(job)
+        return job
+
+    async def get(self, name):
+        return next(job for job in self.jobs if job.name == name)
+
+
+def fake_genai():
+    models = FakeModels()
+    return types.SimpleNamespace(
+        aio=types.SimpleNamespace(models=models, batches=FakeBatches(models))
+    )
+
+
+def test_semantic_cache_requires_matching_operations():
+    cache = SemanticCache()
+    cache.add(MSG_10, _ops(10.0), {"analysis": "ten"})
+
+    assert cache.lookup(MSG_10, _ops(10.0)) == {"analysis": "ten"}
+    assert cache.lookup(MSG_10 + " please", _ops(10.0)) == {"analysis": "ten"}
+    # Near-identical message, different parameters: never another request's answer
+    assert cache.lookup(MSG_30, _ops(30.0)) is None
+    # Same operations, unrelated wording
+    assert cache.lookup("make it louder", _ops(10.0)) is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    # Callers get their own copy
+    cache.lookup(MSG_10, _ops(10.0))["analysis"] = "changed"
+    assert cache.lookup(MSG_10, _ops(10.0)) == {"analysis": "ten"}
+
+
+def test_semantic_cache_grows():
+    cache = SemanticCache()
+    for i in range(100):
+        cache.add(MSG_10, _ops(float(i)), {"analysis": str(i)})
+    assert len(cache) == 100
+    assert all(cache.lookup(MSG_10, _ops(float(i))) == {"analysis": str(i)} for i in range(100))
+
+
+def test_semantic_cache_evicts_oldest_entries():
+    cache = SemanticCache(max_entries=8)
+    for i in range(9):
+        cache.add(MSG_10, _ops(float(i)), {"analysis": str(i)})
+    # The oldest quarter went in one pass to make room
+    assert len(cache) == 7
+    assert cache.lookup(MSG_10, _ops(0.0)) is None
+    assert cache.lookup(MSG_10, _ops(1.0)) is None
+    assert all(cache.lookup(MSG_10, _ops(float(i))) == {"analysis": str(i)} for i in range(2, 9))
+
+
+def test_semantic_cache_reload_respects_max_entries(tmp_path):
+    path = tmp_path / "insights"
+    cache = SemanticCache(path=str(path))
+    for i in range(10):
+        cache.add(MSG_10, _ops(float(i)), {"analysis": str(i)})
+    cache.save()
+
+    reloaded = SemanticCache(path=str(path), max_entries=4)
+    assert len(reloaded) == 4
+    assert reloaded.lookup(MSG_10, _ops(5.0)) is None
+    assert reloaded.lookup(MSG_10, _ops(9.0)) == {"analysis": "9"}
+
+
+def test_semantic_cache_persists(tmp_path):
+    path = tmp_path / "insights"
+    cache = SemanticCache(path=str(path))
+    cache.add(MSG_10, _ops(10.0), {"analysis": "ten"})
+    # Adding never writes; the owner decides when to persist
+    assert cache.dirty and not path.with_suffix(".npz").exists()
+
+    cache.save()
+    assert not cache.dirty
+
+    reloaded = SemanticCache(path=str(path))
+    assert len(reloaded) == 1
+    assert reloaded.lookup(MSG_10, _ops(10.0)) == {"analysis": "ten"}
+    assert reloaded.lookup(MSG_30, _ops(30.0)) is None
+
+
+def test_semantic_cache_clear_is_persisted(tmp_path):
+    path = tmp_path / "insights"
+    cache = SemanticCache(path=str(path))
+    cache.add(MSG_10, _ops(10.0), {"analysis": "ten"})
+    cache.save()
+
+    cache.clear()
+    assert cache.dirty and cache.lookup(MSG_10, _ops(10.0)) is None
+    cache.add(MSG_30, _ops(30.0), {"analysis": "thirty"})
+    assert cache.lookup(MSG_30, _ops(30.0)) == {"analysis": "thirty"}
+    cache.save()
+    assert len(SemanticCache(path=str(path))) == 1
+
+
+def test_semantic_cache_ignores_unreadable_file(tmp_path):
+    path = tmp_path / "insights"
+    np.savez(path.with_suffix(".npz"), matrix=np.zeros((1, 512), dtype=np.float32))
+    path.with_suffix(".json").write_text('[{"analysis": "old format"}]')
+    assert len(SemanticCache(path=str(path))) == 0
+
+
+def test_client_passes_embed_fn_to_cache():
+    seen = []
+
+    def embed(text):
+        seen.append(text)
+        return np.ones(512, dtype=np.float32)
+
+    client = MCPGeminiClient(embed_fn=embed)
+    client.insight_cache.add(MSG_10, _ops(10.0), {})
+    assert seen == [MSG_10]
+
+
+def test_client_passes_max_entries_to_cache():
+    client = MCPGeminiClient(cache_max_entries=5)
+    assert client.insight_cache.max_entries == 5
+
+
+def test_client_caches_gemini_insights_in_background(run, tmp_path):
+    path = tmp_path / "insights"
+    gemini = fake_genai()
+    client = MCPGeminiClient(gemini_client=gemini, cache_path=str(path), cache_save_delay=0)
+
+    def analysis_calls():
+        return sum("Parsed Audio Operations" in p for p in gemini.aio.models.prompts)
+
+    async def scenario():
+        first = await client.process_with_gemini(MSG_10)
+        assert analysis_calls() == 1
+        second = await client.process_with_gemini(MSG_10)
+        assert analysis_calls() == 1
+        assert second["gemini_insights"]["analysis"] == first["gemini_insights"]["analysis"]
+
+        other = await client.process_with_gemini(MSG_30)
+        assert analysis_calls() == 2
+        assert other["gemini_insights"]["analysis"] != first["gemini_insights"]["analysis"]
+        await client.close()
+
+    run(scenario())
+    assert not client.insight_cache.dirty
+    assert len(SemanticCache(path=str(path))) == 2
+
+
+def test_client_does_not_cache_simulated_insights(run):
+    client = MCPGeminiClient()
+    result = run(client.process_with_gemini(MSG_10))
+    assert "analysis" in result["gemini_insights"]
+    assert len(client.insight_cache) == 0
+
+
+def test_interactive_prompts_skip_the_batch_api(run):
+    gemini = fake_genai()
+    client = MCPGeminiClient(gemini_client=gemini)
+    result = run(client.process_with_gemini(MSG_10))
+    assert "analysis" in result["gemini_insights"]
+    assert len(gemini.aio.models.prompts) == 2
+    assert gemini.aio.batches.jobs == []
+
+
+def test_batch_api_sends_prompts_as_one_job(run):
+    gemini = fake_genai()
+    client = MCPGeminiClient(gemini_client=gemini, use_batch_api=True, max_batch=2)
+
+    async def scenario():
+        return await asyncio.gather(client._enqueue("first"), client._enqueue("second"))
+
+    assert run(scenario()) == ["gemini #1", "gemini #2"]
+    assert len(gemini.aio.batches.jobs) == 1
+
+
+def test_batch_item_error_fails_only_that_prompt(run):
+    gemini = fake_genai()
+    gemini.aio.batches.fail = "second"
+    client = MCPGeminiClient(gemini_client=gemini, use_batch_api=True, max_batch=2)
+
+    async def scenario():
+        return await asyncio.gather(
+            client._enqueue("first"), client._enqueue("second"), return_exceptions=True
+        )
+
+    first, second = run(scenario())
+    assert first == "gemini #1"
+    assert isinstance(second, RuntimeError) and "quota exceeded" in str(second)
+
+
+def test_short_batch_response_fails_leftover_prompts(run):
+    gemini = fake_genai()
+    gemini.aio.batches.drop = 1
+    client = MCPGeminiClient(gemini_client=gemini, use_batch_api=True, max_batch=2)
+
+    async def scenario():
+        return await asyncio.wait_for(
+            asyncio.gather(client._enqueue("first"), client._enqueue("second"), return_exceptions=True),
+            timeout=1,
+        )
+
+    first, second = run(scenario())
+    assert first == "gemini #1"
+    assert isinstance(second, RuntimeError)
+
+
+def test_failed_batch_item_is_not_cached(run):
+    gemini = fake_genai()
+    gemini.aio.batches.fail = "Briefly describe"
+    client = MCPGeminiClient(gemini_client=gemini, use_batch_api=True, max_batch=2)
+
+    result = run(client.process_with_gemini(MSG_10))
+    assert "quota exceeded" in result["gemini_insights"]["error"]
+    assert len(client.insight_cache) == 0
+
+
+def test_batch_flusher_sends_partial_batch_after_interval(run):
+    gemini = fake_genai()
+    client = MCPGeminiClient(gemini_client=gemini, use_batch_api=True, flush_interval_ms=10)
+
+    async def scenario():
+        response = await asyncio.wait_for(client._enqueue("only"), timeout=1)
+        await client.close()
+        return response
+
+    assert run(scenario()) == "gemini #1"
+    assert client._flusher is None
+
+
+def test_close_flushes_pending_prompts(run):
+    gemini = fake_genai()
+    client = MCPGeminiClient(gemini_client=gemini, use_batch_api=True, flush_interval_ms=60_000)
+
+    async def scenario():
+        pending = asyncio.ensure_future(
+            asyncio.gather(client._enqueue("first"), client._enqueue("second"))
+        )
+        # Let the flusher start waiting on its (long) interval
+        await asyncio.sleep(0.01)
+        assert not pending.done()
+        await asyncio.wait_for(client.close(), timeout=1)
+        return await pending
+
+    assert run(scenario()) == ["gemini #1", "gemini #2"]
+    assert client._flusher is None and client._pending == []
+
+
+def _intent_calls(gemini):
+    return sum("Briefly describe" in p for p in gemini.aio.models.prompts)
+
+
+def test_cache_hit_sends_no_intent_prompt(run):
+    gemini = fake_genai()
+    client = MCPGeminiClient(gemini_client=gemini)
+
+    async def scenario():
+        await client.process_with_gemini(MSG_10)
+        assert _intent_calls(gemini) == 1
+        return await client.process_with_gemini(MSG_10)
+
+    result = run(scenario())
+    assert client.insight_cache.hits == 1
+    assert "analysis" in result["gemini_insights"]
+    assert _intent_calls(gemini) == 1
+
+
+def test_audio_error_sends_no_gemini_prompt(run, monkeypatch):
+    gemini = fake_genai()
+    client = MCPGeminiClient(gemini_client=gemini)
+
+    async def failing_request(message, audio_file=None):
+        return {"error": "could not parse request"}
+
+    monkeypatch.setattr(client.audio_server, "process_audio_request", failing_request)
+
+    assert run(client.process_with_gemini(MSG_10)) == {"error": "could not parse request"}
+    assert gemini.aio.models.prompts == []
+    assert client.get_conversation_summary()["total_messages"] == 0
+
+
+def test_role_counts_follow_history_eviction(run):
+    client = MCPGeminiClient(gemini_client=fake_genai(), history_limit=3)
+
+    async def scenario():
+        await client.process_with_gemini(MSG_10)
+        await client.process_with_gemini(MSG_30)
+
+    run(scenario())
+    summary = client.get_conversation_summary()
+    assert [m["role"] for m in client.conversation_history] == ["assistant", "user", "assistant"]
+    assert (summary["total_messages"], summary["user_messages"], summary["assistant_messages"]) == (3, 1, 2)
+    assert summary["last_message"]["role"] == "assistant"
+
+
+def test_summary_after_clear(run):
+    client = MCPGeminiClient(gemini_client=fake_genai())
+    run(client.process_with_gemini(MSG_10))
+
+    client.clear_conversation_history()
+    assert client.get_conversation_summary() == {
+        "total_messages": 0,
+        "user_messages": 0,
+        "assistant_messages": 0,
+        "gemini_responses": 0,
+        "conversation_duration": "0 minutes",
+        "last_message": None,
+    }
+
+    run(client.process_with_gemini(MSG_30))
+    summary = client.get_conversation_summary()
+    assert (summary["user_messages"], summary["assistant_messages"]) == (1, 1)
+    assert summary["conversation_duration"] == "0 minutes"
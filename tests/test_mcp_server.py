@@ -1,64 +1,75 @@
+import io
 import os
-import json
 import asyncio
 import numpy as np
+import orjson
 import pytest
 import soundfile as sf
-import types
 import sys
 from pathlib import Path
 
-# Provide a minimal stub for asyncio_mqtt to allow importing the server
-sys.modules.setdefault("asyncio_mqtt", types.ModuleType("asyncio_mqtt"))
+import mcp_audio_server
+mcp_audio_server.ffmpeg = sys.modules["ffmpeg"]
+from mcp_audio_server import AudioProcessingMCP
 
 
-# Provide a minimal stub for torchaudio to avoid heavy dependency
-ta = types.ModuleType("torchaudio")
+def _encode_tone(sr=22050):
+    # Build the tone in place in a single buffer
+    tone = np.arange(sr, dtype=np.float64)
+    tone *= 2 * np.pi * 440 / sr
+    np.sin(tone, out=tone)
+    tone *= 0.5
+    buf = io.BytesIO()
+    sf.write(buf, tone, sr, format="WAV")
+    return buf.getvalue()
 
-def _load(path):
-    data, sr = sf.read(path)
-    if data.ndim == 1:
-        data = data[None, :]
-    return data, sr
 
-def _save(path, waveform, sr):
-    sf.write(path, waveform.T, sr)
+# The tone is deterministic, so encode it once at import
+_WAV_BYTES = _encode_tone()
 
-class _SoxEffects:
-    @staticmethod
-    def apply_effects_tensor(waveform, sr, effects):
-        rate = float(effects[0][1]) if effects else 1.0
-        import librosa
-        stretched = librosa.effects.time_stretch(waveform[0], rate=rate)
-        return stretched[None, :], sr
 
-ta.load = _load
-ta.save = _save
-ta.sox_effects = _SoxEffects()
-sys.modules.setdefault("torchaudio", ta)
+# Operations only read the input and write to the output directory, so one
+# file and one server instance can be shared by the whole session
+@pytest.fixture(scope="session")
+def sample_wav(tmp_path_factory):
+    file_path = tmp_path_factory.mktemp("wav") / "sample.wav"
+    file_path.write_bytes(_WAV_BYTES)
+    return str(file_path)
 
-# Stub ffmpeg module to avoid dependency during tests
-sys.modules.setdefault("ffmpeg", types.ModuleType("ffmpeg"))
 
+@pytest.fixture(scope="session")
+def processed_dir(tmp_path_factory):
+    """Output directory for servers under test, kept out of the repo."""
+    return tmp_path_factory.mktemp("processed")
 
-# Ensure the project root is on the path when running tests directly
-ROOT = Path(__file__).resolve().parents[1]
-sys.path.append(str(ROOT))
-import mcp_audio_server
-mcp_audio_server.ffmpeg = sys.modules["ffmpeg"]
-from mcp_audio_server import AudioProcessingMCP
+
+@pytest.fixture(scope="session")
+def server(processed_dir):
+    server = AudioProcessingMCP()
+    server.processed_dir = processed_dir
+    return server
 
 
 @pytest.fixture
-def sample_wav(tmp_path):
-    sr = 22050
-    t = np.linspace(0, 1, sr, False)
-    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
-    file_path = tmp_path / "sample.wav"
-    sf.write(file_path, tone, sr)
-    return str(file_path)
+def fast_writes(monkeypatch):
+    """Replace audio encoding with an empty marker file when WAVEQ_TEST_FAST=1.
 
+    Only for tests that check an output exists and never read it back.
+    """
+    if os.getenv("WAVEQ_TEST_FAST") != "1":
+        return
 
+    def _touch(path, *args, **kwargs):
+        Path(path).touch()
+
+    def _export(self, path, *args, **kwargs):
+        _touch(path)
+
+    monkeypatch.setattr(mcp_audio_server.sf, "write", _touch)
+    monkeypatch.setattr(mcp_audio_server.AudioSegment, "export", _export)
+
+
+@pytest.mark.usefixtures("fast_writes")
 @pytest.mark.parametrize(
     "operation,params",
     [
@@ -78,54 +89,56 @@ def sample_wav(tmp_path):
 
     ],
 )
-def test_audio_operations(sample_wav, operation, params):
-    server = AudioProcessingMCP()
+def test_audio_operations(run, server, sample_wav, operation, params):
     method = getattr(server, operation)
-    result = asyncio.run(method(sample_wav, params))
+    result = run(method(sample_wav, params))
     assert os.path.exists(result["output_path"])
 
 
-def test_merge_audio_files(sample_wav, tmp_path):
+def test_merge_audio_files(run, server, sample_wav, tmp_path):
     second_path = tmp_path / "second.wav"
     sr = 22050
     sf.write(second_path, np.zeros(sr), sr)
-    server = AudioProcessingMCP()
-    result = asyncio.run(
+    result = run(
         server.merge_audio_files(sample_wav, {"additional_files": [str(second_path)]})
     )
     assert os.path.exists(result["output_path"])
     assert len(result["merged_files"]) == 2
 
 
-def test_split_audio(sample_wav):
-    server = AudioProcessingMCP()
-    result = asyncio.run(server.split_audio(sample_wav, {"segment_duration": 1}))
+def test_split_audio(run, server, sample_wav):
+    result = run(server.split_audio(sample_wav, {"segment_duration": 1}))
     assert result["total_segments"] >= 1
+    # One directory listing instead of a stat per segment
+    segment_dir = Path(result["segment_paths"][0]).parent
+    existing = {entry.name for entry in os.scandir(segment_dir)}
     for path in result["segment_paths"]:
-        assert os.path.exists(path)
+        assert Path(path).name in existing
 
 
 @pytest.mark.skipif(
     not hasattr(sys.modules["ffmpeg"], "input"),
     reason="ffmpeg not available for format conversion",
 )
-def test_convert_format(sample_wav):
-    server = AudioProcessingMCP()
-    result = asyncio.run(server.convert_format(sample_wav, {"target_format": "wav"}))
+def test_convert_format(run, server, sample_wav):
+    result = run(server.convert_format(sample_wav, {"target_format": "wav"}))
     assert os.path.exists(result["output_path"])
 
 
-def test_process_operations(sample_wav):
-    server = AudioProcessingMCP()
+def test_process_operations(run, server, sample_wav):
     ops = [
         {"name": "trim", "start": 0, "end": 0.5},
         {"name": "augment", "noise_level": 0.01, "pitch_shift": 0},
         {"name": "fade_in", "duration": 100},
     ]
-    out_path = asyncio.run(server.process_operations(sample_wav, ops))
+    out_path = run(server.process_operations(sample_wav, ops))
     assert os.path.exists(out_path)
 
 
+async def _anop(*args, **kwargs):
+    """Shared no-op coroutine for fake client methods."""
+
+
 class FakeTopic:
     def __init__(self, value):
         self.value = value
@@ -141,12 +154,14 @@ class FakeMQTTClient:
     def __init__(self):
         self.incoming = asyncio.Queue()
         self.published = []
+        self.result_published = asyncio.Event()
 
     async def publish(self, topic, payload):
-        self.published.append((topic, json.loads(payload)))
+        self.published.append((topic, orjson.loads(payload)))
+        if topic.startswith("audio/results/"):
+            self.result_published.set()
 
-    async def subscribe(self, topic):
-        pass
+    subscribe = _anop
 
     def messages(self):
         client = self
@@ -167,9 +182,11 @@ class FakeMQTTClient:
         return _CM()
 
 
-def test_full_mqtt_flow(sample_wav):
+def test_full_mqtt_flow(run, sample_wav, processed_dir):
     async def run_flow():
+        # Own instance so queued requests never leak into the shared server
         server = AudioProcessingMCP()
+        server.processed_dir = processed_dir
         client = FakeMQTTClient()
 
         tasks = [
@@ -184,14 +201,12 @@ def test_full_mqtt_flow(sample_wav):
             "parameters": {"start_time": 0, "end_time": 0.5},
         }
         await client.incoming.put(
-            FakeMessage("audio/edit", json.dumps(payload).encode())
+            FakeMessage("audio/edit", orjson.dumps(payload))
         )
 
-        for _ in range(20):
-            if any(topic == "audio/results/req1" for topic, _ in client.published):
-                break
-            await asyncio.sleep(0.2)
-        else:
+        try:
+            await asyncio.wait_for(client.result_published.wait(), timeout=4.0)
+        except asyncio.TimeoutError:
             assert False, "result not published"
 
         for t in tasks:
@@ -201,4 +216,4 @@ def test_full_mqtt_flow(sample_wav):
         assert any(topic == "audio/results/req1" for topic, _ in client.published)
         assert any(topic == "audio/status/req1" for topic, _ in client.published)
 
-    asyncio.run(run_flow())
+    run(run_flow())
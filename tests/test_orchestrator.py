@@ -1,14 +1,35 @@
+import os
+import socket
+import threading
+import time
+import types
+
+import orjson
 import pytest
+import yaml
 
+import orchestrator
 from orchestrator import parse_flow
 
 
-def test_parse_flow_yaml(tmp_path):
-    flow = tmp_path / "flow.yaml"
-    flow.write_text(
+@pytest.fixture(scope="module")
+def flow_files(tmp_path_factory):
+    """Flow files are only read, so write them once for the module."""
+    d = tmp_path_factory.mktemp("flows")
+    good = d / "flow.yaml"
+    good.write_text(
         "workflow_name: demo\nsteps:\n  - name: cut\n    type: trim\n"
     )
-    actions = parse_flow(str(flow))
+    bad = d / "bad.yaml"
+    bad.write_text(
+        "workflow_name: bad\nsteps:\n  - name: step\n    type: unknown\n"
+    )
+    return good, bad
+
+
+def test_parse_flow_yaml(flow_files):
+    good, _ = flow_files
+    actions = parse_flow(str(good))
     assert len(actions) == 1
     action = actions[0]
     assert action["operation"] == "trim"
@@ -16,10 +37,222 @@ def test_parse_flow_yaml(tmp_path):
     assert action["queue_task"]["operation"] == "trim"
 
 
-def test_parse_flow_invalid_type(tmp_path):
-    flow = tmp_path / "bad.yaml"
-    flow.write_text(
-        "workflow_name: bad\nsteps:\n  - name: step\n    type: unknown\n"
-    )
+def test_parse_flow_invalid_type(flow_files):
+    _, bad = flow_files
     with pytest.raises(ValueError):
-        parse_flow(str(flow))
+        parse_flow(str(bad))
+
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason="PyYAML built without libyaml")
+def test_parse_flow_uses_libyaml_loader():
+    assert orchestrator._YAMLLoader is yaml.CSafeLoader
+
+
+def test_parse_flow_reloads_modified_file(tmp_path):
+    flow = tmp_path / "flow.yaml"
+    flow.write_text("workflow_name: demo\nsteps:\n  - type: trim\n")
+    first = parse_flow(str(flow))
+    again = parse_flow(str(flow))
+    assert first[0]["queue_task"]["request_id"] != again[0]["queue_task"]["request_id"]
+
+    flow.write_text("workflow_name: demo\nsteps:\n  - type: trim\n  - type: normalize\n")
+    actions = parse_flow(str(flow))
+    assert [a["operation"] for a in actions] == ["trim", "normalize"]
+
+
+class _FakeBroker:
+    """Minimal MQTT 3.1.1 broker: acks CONNECT and records PUBLISH topics."""
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        self.published = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _read(conn, n):
+        data = b""
+        while len(data) < n:
+            chunk = conn.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def _serve(self, conn):
+        with conn:
+            try:
+                while True:
+                    kind = self._read(conn, 1)[0] >> 4
+                    length, shift = 0, 0
+                    while True:
+                        byte = self._read(conn, 1)[0]
+                        length |= (byte & 0x7F) << shift
+                        shift += 7
+                        if not byte & 0x80:
+                            break
+                    body = self._read(conn, length)
+                    if kind == 1:  # CONNECT
+                        conn.sendall(b"\x20\x02\x00\x00")
+                    elif kind == 3:  # PUBLISH
+                        topic_len = int.from_bytes(body[:2], "big")
+                        self.published.append(body[2:2 + topic_len].decode())
+                    elif kind == 12:  # PINGREQ
+                        conn.sendall(b"\xd0\x00")
+            except (ConnectionError, OSError):
+                return
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_dispatch_step_publishes_from_forked_worker(monkeypatch):
+    broker = _FakeBroker()
+    monkeypatch.setattr(orchestrator, "MQTT_PUBLISH_TIMEOUT", 2.0)
+    monkeypatch.setattr(orchestrator, "_get_redis", lambda url: types.SimpleNamespace(set=lambda *a: None))
+    # The parent already holds a connected client, as after WorkflowOrchestrator()
+    parent_client = orchestrator._get_mqtt_client("127.0.0.1", broker.port)
+    payload = {"id": "s1", "callback": "audio/status/s1"}
+    try:
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - runs in the child
+            code = 1
+            try:
+                assert orchestrator._connect_mqtt.cache_info().currsize == 0
+                orchestrator._dispatch_step(
+                    payload, redis_url="redis://", mqtt_broker="127.0.0.1", mqtt_port=broker.port
+                )
+                code = 0
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+
+        deadline = time.monotonic() + 2
+        while len(broker.published) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sorted(broker.published) == ["audio/edit", "audio/status/s1"]
+    finally:
+        parent_client.loop_stop()
+        parent_client.disconnect()
+        orchestrator._connect_mqtt.cache_clear()
+        broker.close()
+
+
+class _FakeInfo:
+    def __init__(self, published):
+        self.published = published
+        self.timeouts = []
+
+    def wait_for_publish(self, timeout=None):
+        self.timeouts.append(timeout)
+
+    def is_published(self):
+        return self.published
+
+
+def _fake_clients(monkeypatch, published):
+    sent, statuses = [], {}
+    infos = []
+
+    class FakeMQTT:
+        def publish(self, topic, payload):
+            sent.append((topic, orjson.loads(payload)))
+            infos.append(_FakeInfo(published))
+            return infos[-1]
+
+    monkeypatch.setattr(orchestrator, "_get_mqtt_client", lambda broker, port: FakeMQTT())
+    monkeypatch.setattr(
+        orchestrator, "_get_redis", lambda url: types.SimpleNamespace(set=statuses.__setitem__)
+    )
+    return sent, statuses, infos
+
+
+def test_dispatch_step_waits_for_publish(monkeypatch):
+    sent, statuses, infos = _fake_clients(monkeypatch, published=True)
+    payload = {"id": "s1", "callback": "audio/status/s1"}
+    orchestrator._dispatch_step(payload, redis_url="redis://", mqtt_broker="b", mqtt_port=1)
+    assert sent == [("audio/edit", payload), ("audio/status/s1", {"status": "dispatched"})]
+    assert [info.timeouts for info in infos] == [[orchestrator.MQTT_PUBLISH_TIMEOUT]] * 2
+    assert statuses == {"status:s1": "dispatched"}
+
+
+def test_dispatch_step_fails_when_publish_unconfirmed(monkeypatch):
+    _, statuses, _ = _fake_clients(monkeypatch, published=False)
+    payload = {"id": "s1", "callback": "audio/status/s1"}
+    with pytest.raises(TimeoutError):
+        orchestrator._dispatch_step(payload, redis_url="redis://", mqtt_broker="b", mqtt_port=1)
+    # A step that never reached the broker is not reported as dispatched
+    assert statuses == {}
+
+
+def test_enqueue_workflow_runs_jobs(monkeypatch, flow_files):
+    fakeredis = pytest.importorskip("fakeredis")
+    from rq import SimpleWorker
+
+    redis = fakeredis.FakeRedis()
+    sent, _, _ = _fake_clients(monkeypatch, published=True)
+    monkeypatch.setattr(orchestrator, "_get_redis", lambda url: redis)
+
+    orch = orchestrator.WorkflowOrchestrator(redis_url="redis://fake", mqtt_broker="b", mqtt_port=1)
+    orch.workflows["pair"] = [
+        {"operation": "trim", "parameters": {"end": 1}, "ttl": 120, "retries": 2},
+        {"operation": "normalize", "parameters": None, "ttl": 60, "retries": 0},
+    ]
+    result = orch.enqueue_workflow("pair", "a.wav", "c1")
+
+    trim_job, norm_job = (orch.queue.fetch_job(step_id) for step_id in result["steps"])
+    assert orch.queue.job_ids == result["steps"]
+    assert trim_job.func_name == norm_job.func_name == "orchestrator._dispatch_step"
+    assert (trim_job.ttl, trim_job.retries_left) == (120, 2)
+    assert (norm_job.ttl, norm_job.retries_left) == (60, None)
+    assert trim_job.kwargs == {"redis_url": "redis://fake", "mqtt_broker": "b", "mqtt_port": 1}
+
+    SimpleWorker([orch.queue], connection=redis).work(burst=True)
+
+    trim_id, norm_id = result["steps"]
+    assert sent == [
+        ("audio/edit", {
+            "id": trim_id,
+            "workflow_id": result["workflow_id"],
+            "client_id": "c1",
+            "audio_data": "a.wav",
+            "operation": "trim",
+            "parameters": {"end": 1},
+            "callback": f"audio/status/{trim_id}",
+        }),
+        (f"audio/status/{trim_id}", {"status": "dispatched"}),
+        ("audio/edit", {
+            "id": norm_id,
+            "workflow_id": result["workflow_id"],
+            "client_id": "c1",
+            "audio_data": "a.wav",
+            "operation": "normalize",
+            "parameters": {},
+            "callback": f"audio/status/{norm_id}",
+        }),
+        (f"audio/status/{norm_id}", {"status": "dispatched"}),
+    ]
+    assert redis.get(f"status:{trim_id}") == redis.get(f"status:{norm_id}") == b"dispatched"
+
+    # Flow files may leave ttl/retries out; parse_flow then stores None
+    good, _ = flow_files
+    from_file = orch.enqueue_from_file(str(good), "b.wav", "c2")
+    (file_id,) = from_file["steps"]
+    file_job = orch.queue.fetch_job(file_id)
+    assert (file_job.ttl, file_job.retries_left) == (3600, None)
+
+    SimpleWorker([orch.queue], connection=redis).work(burst=True)
+    assert sent[-2][1]["operation"] == "trim"
+    assert redis.get(f"status:{file_id}") == b"dispatched"